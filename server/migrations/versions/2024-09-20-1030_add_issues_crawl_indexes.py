@@ -0,0 +1,61 @@
+"""Add issues crawl indexes
+
+Revision ID: 3b6a4f1e2c9d
+Revises: 19f9bb88313b
+Create Date: 2024-09-20 10:30:12.104312
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# Polar Custom Imports
+
+# revision identifiers, used by Alembic.
+revision = "3b6a4f1e2c9d"
+down_revision = "19f9bb88313b"
+branch_labels: tuple[str] | None = None
+depends_on: tuple[str] | None = None
+
+
+def upgrade() -> None:
+    # Built concurrently, not to lock the issues table while indexing it
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_issues_crawl_issue",
+            "issues",
+            [
+                "organization_id",
+                sa.text("COALESCE(github_issue_fetched_at, '-infinity'::timestamptz)"),
+            ],
+            unique=False,
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_issues_crawl_timeline",
+            "issues",
+            [
+                "organization_id",
+                sa.text(
+                    "COALESCE(github_timeline_fetched_at, '-infinity'::timestamptz)"
+                ),
+            ],
+            unique=False,
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_issues_crawl_timeline",
+            table_name="issues",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_issues_crawl_issue",
+            table_name="issues",
+            postgresql_concurrently=True,
+        )
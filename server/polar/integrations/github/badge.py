@@ -1,3 +1,4 @@
+import functools
 from dataclasses import dataclass
 
 import structlog
@@ -21,6 +22,16 @@ PLEDGE_BADGE_COMMENT_START = "<!-- POLAR PLEDGE BADGE START -->"
 PLEDGE_BADGE_COMMENT_END = "<!-- POLAR PLEDGE BADGE END -->"
 
 
+# The default promotion message only depends on the organization's URL:
+# render it once per organization, not once per badge.
+@functools.lru_cache(maxsize=1024)
+def _render_default_promotion_message(polar_site_url: str) -> str:
+    return template.render(
+        template.path(__file__, "templates/badge/promotion.md"),
+        polar_site_url=polar_site_url,
+    )
+
+
 @dataclass
 class GithubBadge:
     external_organization: ExternalOrganization
@@ -28,6 +39,32 @@ class GithubBadge:
     issue: Issue
     organization: Organization
 
+    @classmethod
+    def is_enabled(cls) -> tuple[ShouldEmbed, ShouldEmbedReason]:
+        """
+        Checks that don't depend on the organization, shared by all issues.
+        """
+        if not settings.GITHUB_BADGE_EMBED:
+            return (False, "app_badge_not_enabled")
+
+        return (True, "app_badge_enabled")
+
+    @classmethod
+    def can_embed_on_organization(
+        cls, external_organization: ExternalOrganization
+    ) -> tuple[ShouldEmbed, ShouldEmbedReason]:
+        """
+        Checks that don't depend on the issue, shared by all issues of an organization.
+        """
+        (enabled, reason) = cls.is_enabled()
+        if not enabled:
+            return (enabled, reason)
+
+        if external_organization.installation_id is None:
+            return (False, "org_not_installed")
+
+        return (True, "organization_installed")
+
     @classmethod
     def should_add_badge(
         cls,
@@ -36,11 +73,9 @@ class GithubBadge:
         issue: Issue,
         triggered_from_label: bool,
     ) -> tuple[ShouldEmbed, ShouldEmbedReason]:
-        if not settings.GITHUB_BADGE_EMBED:
-            return (False, "app_badge_not_enabled")
-
-        if external_organization.installation_id is None:
-            return (False, "org_not_installed")
+        (should, reason) = cls.can_embed_on_organization(external_organization)
+        if not should:
+            return (should, reason)
 
         # Triggered by label
         if triggered_from_label:
@@ -63,11 +98,9 @@ class GithubBadge:
         issue: Issue,
         triggered_from_label: bool,
     ) -> tuple[ShouldEmbed, ShouldEmbedReason]:
-        if not settings.GITHUB_BADGE_EMBED:
-            return (False, "app_badge_not_enabled")
-
-        if external_organization.installation_id is None:
-            return (False, "org_not_installed")
+        (should, reason) = cls.can_embed_on_organization(external_organization)
+        if not should:
+            return (should, reason)
 
         if triggered_from_label:
             return (True, "triggered_from_label")
@@ -119,10 +152,7 @@ class GithubBadge:
 
     @classmethod
     def generate_default_promotion_message(cls, organization: Organization) -> str:
-        return template.render(
-            template.path(__file__, "templates/badge/promotion.md"),
-            polar_site_url=organization.polar_site_url,
-        )
+        return _render_default_promotion_message(organization.polar_site_url)
 
     def promotion_message(self) -> str:
         if self.issue.badge_custom_content:
@@ -191,10 +221,13 @@ class GithubBadge:
         github.ensure_expected_response(updated)
         return updated.parsed_data
 
-    async def embed(self) -> None:
-        client = github.get_app_installation_client(
-            self.external_organization.safe_installation_id
-        )
+    async def embed(
+        self, client: GitHub[AppInstallationAuthStrategy] | None = None
+    ) -> None:
+        if client is None:
+            client = github.get_app_installation_client(
+                self.external_organization.safe_installation_id
+            )
 
         body = await self.get_current_body(client)
 
@@ -208,10 +241,13 @@ class GithubBadge:
         log.info("github.badge.embed.embedded", issue_id=self.issue.id)
         return None
 
-    async def remove(self) -> None:
-        client = github.get_app_installation_client(
-            self.external_organization.safe_installation_id
-        )
+    async def remove(
+        self, client: GitHub[AppInstallationAuthStrategy] | None = None
+    ) -> None:
+        if client is None:
+            client = github.get_app_installation_client(
+                self.external_organization.safe_installation_id
+            )
 
         body = await self.get_current_body(client)
         if not self.badge_is_embedded(body):
@@ -1,9 +1,33 @@
 import datetime
+import time
 
 from githubkit.cache.base import BaseCache
 
 from polar.redis import redis
 
+# In-process copy of the values read from Redis, along with their expiration time.
+# Every request of an installation client reads its token from the cache:
+# keeping it in memory saves a Redis round trip per request.
+# Entries are kept in least recently used order, and the cache is bounded to
+# `LOCAL_CACHE_MAX_SIZE` entries.
+_local_cache: dict[str, tuple[str, float]] = {}
+
+LOCAL_CACHE_MAX_SIZE = 1024
+
+
+def _local_cache_set(key: str, value: str, expires_at: float) -> None:
+    _local_cache.pop(key, None)
+
+    if len(_local_cache) >= LOCAL_CACHE_MAX_SIZE:
+        # Purge expired entries first, then the least recently used ones
+        now = time.monotonic()
+        for expired_key in [k for k, (_, e) in _local_cache.items() if e <= now]:
+            del _local_cache[expired_key]
+        while len(_local_cache) >= LOCAL_CACHE_MAX_SIZE:
+            del _local_cache[next(iter(_local_cache))]
+
+    _local_cache[key] = (value, expires_at)
+
 
 class RedisCache(BaseCache):
     """Redis Backed Cache"""
@@ -15,10 +39,34 @@ class RedisCache(BaseCache):
         raise NotImplementedError()
 
     async def aget(self, key: str) -> str | None:
-        return await redis.get(f"githubkit:{self.app}:{key}")
+        redis_key = self._get_redis_key(key)
+
+        if (cached := _local_cache.get(redis_key)) is not None:
+            value, expires_at = cached
+            del _local_cache[redis_key]
+            if time.monotonic() < expires_at:
+                # Move it back to the most recently used end
+                _local_cache[redis_key] = cached
+                return value
+
+        async with redis.pipeline() as pipe:
+            pipe.get(redis_key)
+            pipe.pttl(redis_key)
+            redis_value, ttl = await pipe.execute()
+
+        # Only keep values that expire, as the tokens they hold do
+        if redis_value is not None and ttl > 0:
+            _local_cache_set(redis_key, redis_value, time.monotonic() + ttl / 1000)
+
+        return redis_value
 
     def set(self, key: str, value: str, ex: datetime.timedelta) -> None:
         raise NotImplementedError()
 
     async def aset(self, key: str, value: str, ex: datetime.timedelta) -> None:
-        await redis.setex(f"githubkit:{self.app}:{key}", time=ex, value=value)
+        redis_key = self._get_redis_key(key)
+        await redis.setex(redis_key, time=ex, value=value)
+        _local_cache_set(redis_key, value, time.monotonic() + ex.total_seconds())
+
+    def _get_redis_key(self, key: str) -> str:
+        return f"githubkit:{self.app}:{key}"
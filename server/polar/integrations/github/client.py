@@ -13,7 +13,7 @@ from githubkit import (
     utils,
     webhooks,
 )
-from githubkit.typing import Missing
+from githubkit.typing import Missing, RetryDecisionFunc
 from githubkit.utils import UNSET, Unset
 from pydantic import BaseModel, Field
 
@@ -236,6 +236,7 @@ def get_app_installation_client(
     *,
     permissions: AppPermissionsType | Unset = UNSET,
     app: GitHubApp = GitHubApp.polar,
+    auto_retry: bool | RetryDecisionFunc = True,
 ) -> GitHub[AppInstallationAuthStrategy]:
     if not installation_id:
         raise Exception("unable to create github client: no installation_id provided")
@@ -254,7 +255,8 @@ def get_app_installation_client(
                 installation_id=installation_id,
                 permissions=permissions,
                 cache=RedisCache(app),
-            )
+            ),
+            auto_retry=auto_retry,
         )
     elif app == GitHubApp.repository_benefit:
         return GitHub(
@@ -266,7 +268,8 @@ def get_app_installation_client(
                 installation_id=installation_id,
                 permissions=permissions,
                 cache=RedisCache(app),
-            )
+            ),
+            auto_retry=auto_retry,
         )
 
 
@@ -17,6 +17,12 @@ async def schedule_embed_badge_task(
 ) -> None:
     session = hook.session
 
+    # Skip the lookups below when the badge can't be added anyway.
+    # This hook runs for every upserted issue, so avoid the round-trips.
+    (enabled, _) = GithubBadge.is_enabled()
+    if not enabled or hook.issue.pledge_badge_ever_embedded:
+        return
+
     external_organization = await external_organization_service.get_linked(
         session, hook.issue.organization_id
     )
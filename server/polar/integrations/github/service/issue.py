@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import datetime
-from collections.abc import Awaitable, Sequence
+from collections.abc import Awaitable, Callable, Sequence
 from typing import Any, Literal
 from uuid import UUID
 
 import structlog
-from githubkit import GitHub, Paginator
-from githubkit.exception import RequestFailed
-from sqlalchemy import asc, or_
+from githubkit import AppInstallationAuthStrategy, GitHub, Paginator, Response
+from githubkit.exception import (
+    GitHubException,
+    RateLimitExceeded,
+    RequestFailed,
+    SecondaryRateLimitExceeded,
+)
+from githubkit.retry import RETRY_SERVER_ERROR
+from githubkit.typing import RetryOption
+from sqlalchemy import TIMESTAMP, Select, asc, func, literal_column
+from sqlalchemy.orm import contains_eager
 
 from polar.dashboard.schemas import IssueSortBy
 from polar.enums import Platforms
@@ -44,6 +53,48 @@ from .repository import github_repository
 
 log: Logger = structlog.get_logger()
 
+# Maximum number of concurrent GitHub requests when (un)embedding badges in bulk
+BADGE_CONCURRENCY = 8
+
+# Number of synced issues to apply before committing in sync_issues_batch
+SYNC_ISSUES_COMMIT_WINDOW = 200
+
+# Minimum time between two crawls of the same issue
+CRAWL_INTERVAL = datetime.timedelta(hours=12)
+
+# Retries of a crawl request hitting a secondary rate limit
+CRAWL_MAX_RATE_LIMIT_RETRIES = 2
+
+
+def crawl_retry(exc: GitHubException, retry_count: int) -> RetryOption:
+    """
+    Retry policy of the requests made in bulk, while crawling issues or updating
+    badges.
+
+    Secondary rate limits are short-lived: wait for them as told by GitHub,
+    backing off exponentially if they keep happening.
+    Primary rate limits only reset hourly: don't wait for them, the remaining
+    requests are left to the next crawl or job retry.
+    Server errors are retried with githubkit's default backoff.
+    """
+    if isinstance(exc, SecondaryRateLimitExceeded):
+        if retry_count < CRAWL_MAX_RATE_LIMIT_RETRIES:
+            return RetryOption(True, exc.retry_after * 2**retry_count)
+        return RetryOption(False)
+    if isinstance(exc, RateLimitExceeded):
+        return RetryOption(False)
+    return RETRY_SERVER_ERROR(exc, retry_count)
+
+
+# How long an issue claimed by a crawl is skipped by the next ones, if the crawl
+# didn't manage to sync it
+CRAWL_CLAIM_LEASE = datetime.timedelta(minutes=30)
+
+# Stand-in for issues that were never fetched, so they sort first. The crawl queries
+# compare `COALESCE(fetched_at, NEVER_FETCHED)` instead of `fetched_at IS NULL OR ...`
+# so they match the expression of the crawl indexes on `issues`.
+NEVER_FETCHED = literal_column("'-infinity'::timestamptz", TIMESTAMP(timezone=True))
+
 
 class GithubIssueService(IssueService):
     async def get_by_external_id(
@@ -92,6 +143,14 @@ class GithubIssueService(IssueService):
         repository: Repository,
         autocommit: bool = True,
     ) -> Sequence[Issue]:
+        """
+        Upsert issues from GitHub.
+
+        Issues already stored with the same values are returned as is: they're not
+        written again and don't trigger the hooks. Issues are returned in the order
+        of `data`, pull requests excluded.
+        """
+
         def parse(
             issue: types.WebhookIssuesOpenedPropIssue
             | types.WebhookIssuesEditedPropIssue
@@ -100,7 +159,9 @@ class GithubIssueService(IssueService):
             | types.WebhookIssuesDeletedPropIssue
             | types.Issue,
         ) -> IssueCreate:
-            return IssueCreate.from_github(issue, organization, repository)
+            # Both REST and webhook payloads are fully validated by githubkit,
+            # skip validating them again
+            return IssueCreate.from_github_fast(issue, organization, repository)
 
         def filter(
             issue: types.WebhookIssuesOpenedPropIssue
@@ -132,9 +193,32 @@ class GithubIssueService(IssueService):
             )
             return []
 
+        # Skip the upsert of issues that wouldn't change, e.g. webhooks delivered
+        # again or crawled issues without relevant changes. This saves the write,
+        # and the hooks reacting to it.
+        existing_issues = await self._list_by_external_ids(
+            session, [schema.external_id for schema in schemas]
+        )
+        unchanged: list[Issue] = []
+        changed: list[IssueCreate] = []
+        for schema in schemas:
+            existing_issue = existing_issues.get(schema.external_id)
+            if existing_issue is not None and all(
+                getattr(existing_issue, key) == getattr(schema, key)
+                for key in IssueCreate.__mutable_keys__
+            ):
+                unchanged.append(existing_issue)
+            else:
+                changed.append(schema)
+
+        if not changed:
+            if autocommit:
+                await session.commit()
+            return unchanged
+
         records = await self.upsert_many(
             session,
-            schemas,
+            changed,
             constraints=[Issue.external_id],
             mutable_keys=IssueCreate.__mutable_keys__,
             autocommit=autocommit,
@@ -149,11 +233,24 @@ class GithubIssueService(IssueService):
         # Today (2023-09-14) this only affects issues/for_you.
         #
         # TODO: migrate away from this hook!
+        #
+        # Hooks are awaited one by one on purpose: they all share `session`, which
+        # doesn't support concurrent operations.
         if autocommit:
             for record in records:
                 await issue_upserted.call(IssueHook(session, record))
 
-        return records
+        # Return the issues in the order of `data`, whether they were written or not
+        stored = {issue.external_id: issue for issue in unchanged}
+        stored.update((record.external_id, record) for record in records)
+        return [stored[schema.external_id] for schema in schemas]
+
+    async def _list_by_external_ids(
+        self, session: AsyncSession, external_ids: list[int]
+    ) -> dict[int, Issue]:
+        stmt = sql.select(Issue).where(Issue.external_id.in_(external_ids))
+        res = await session.execute(stmt)
+        return {issue.external_id: issue for issue in res.scalars().all()}
 
     async def set_issue_badge_custom_message(
         self, session: AsyncSession, issue: Issue, message: str
@@ -180,43 +277,78 @@ class GithubIssueService(IssueService):
         organization: Organization,
         triggered_from_label: bool,
     ) -> bool:
-        (should, reason) = GithubBadge.should_add_badge(
-            external_organization=external_organization,
-            repository=repository,
-            issue=issue,
+        embedded = await self.embed_badge_many(
+            session,
+            badges=[
+                GithubBadge(
+                    external_organization=external_organization,
+                    repository=repository,
+                    issue=issue,
+                    organization=organization,
+                )
+            ],
             triggered_from_label=triggered_from_label,
         )
-        if not should:
-            log.info(
-                "github.issue.badge",
-                embedded=False,
-                reason=reason,
-                issue_id=issue.id,
+        return len(embedded) > 0
+
+    async def embed_badge_many(
+        self,
+        session: AsyncSession,
+        *,
+        badges: Sequence[GithubBadge],
+        triggered_from_label: bool,
+    ) -> list[Issue]:
+        """
+        Embed the badge on several issues, with the GitHub calls running concurrently
+        and a single UPDATE + commit for the whole batch.
+
+        Returns the issues that got the badge embedded. If some of them failed, the
+        successful ones are still saved before raising the first error.
+        """
+        to_embed: list[GithubBadge] = []
+        for badge in badges:
+            (should, reason) = GithubBadge.should_add_badge(
+                external_organization=badge.external_organization,
+                repository=badge.repository,
+                issue=badge.issue,
+                triggered_from_label=triggered_from_label,
             )
-            return False
+            if not should:
+                log.info(
+                    "github.issue.badge",
+                    embedded=False,
+                    reason=reason,
+                    issue_id=badge.issue.id,
+                )
+                continue
+            to_embed.append(badge)
 
-        badge = GithubBadge(
-            external_organization=external_organization,
-            repository=repository,
-            issue=issue,
-            organization=organization,
+        if not to_embed:
+            return []
+
+        issues, error = await self._update_badges(
+            to_embed, lambda badge, client: badge.embed(client)
         )
-        await badge.embed()
 
-        stmt = (
-            sql.update(Issue)
-            .values(
-                pledge_badge_embedded_at=utc_now(),
-                pledge_badge_ever_embedded=True,
+        if issues:
+            stmt = (
+                sql.update(Issue)
+                .values(
+                    pledge_badge_embedded_at=utc_now(),
+                    pledge_badge_ever_embedded=True,
+                )
+                .where(Issue.id.in_([issue.id for issue in issues]))
             )
-            .where(Issue.id == issue.id)
-        )
-        await session.execute(stmt)
-        await session.commit()
+            await session.execute(stmt)
+            await session.commit()
 
-        await loops_service.issue_badged(session, issue=issue)
+            for issue in issues:
+                await loops_service.issue_badged(session, issue=issue)
 
-        return True
+        if error is not None:
+            raise error
+
+        return issues
 
     async def remove_badge(
         self,
@@ -228,44 +360,132 @@ class GithubIssueService(IssueService):
         organization: Organization,
         triggered_from_label: bool,
     ) -> bool:
-        (should, reason) = GithubBadge.should_remove_badge(
-            external_organization=external_organization,
-            repository=repository,
-            issue=issue,
+        await self.remove_badge_many(
+            session,
+            badges=[
+                GithubBadge(
+                    external_organization=external_organization,
+                    repository=repository,
+                    issue=issue,
+                    organization=organization,
+                )
+            ],
             triggered_from_label=triggered_from_label,
         )
-        if not should:
-            log.info(
-                "github.issue.badge",
-                embedded=False,
-                reason=reason,
-                issue_id=issue.id,
+
+        # TODO: Return True instead to reflect update.
+        # Just need to write & perform tests before changing.
+        return False
+
+    async def remove_badge_many(
+        self,
+        session: AsyncSession,
+        *,
+        badges: Sequence[GithubBadge],
+        triggered_from_label: bool,
+    ) -> list[Issue]:
+        """
+        Remove the badge from several issues, with the GitHub calls running
+        concurrently and a single UPDATE + commit for the whole batch.
+
+        Returns the issues that got the badge removed. If some of them failed, the
+        successful ones are still saved before raising the first error.
+        """
+        to_remove: list[GithubBadge] = []
+        for badge in badges:
+            (should, reason) = GithubBadge.should_remove_badge(
+                external_organization=badge.external_organization,
+                repository=badge.repository,
+                issue=badge.issue,
+                triggered_from_label=triggered_from_label,
             )
-            return False
+            if not should:
+                log.info(
+                    "github.issue.badge",
+                    embedded=False,
+                    reason=reason,
+                    issue_id=badge.issue.id,
+                )
+                continue
+            to_remove.append(badge)
+
+        if not to_remove:
+            return []
 
-        badge = GithubBadge(
-            external_organization=external_organization,
-            repository=repository,
-            issue=issue,
-            organization=organization,
-        )
         # TODO: Abort unless not successful
-        await badge.remove()
+        issues, error = await self._update_badges(
+            to_remove, lambda badge, client: badge.remove(client)
+        )
 
-        stmt = (
-            sql.update(Issue)
-            .values(
-                pledge_badge_embedded_at=None,
-                pledge_badge_ever_embedded=True,
+        if issues:
+            stmt = (
+                sql.update(Issue)
+                .values(
+                    pledge_badge_embedded_at=None,
+                    pledge_badge_ever_embedded=True,
+                )
+                .where(Issue.id.in_([issue.id for issue in issues]))
             )
-            .where(Issue.id == issue.id)
-        )
-        await session.execute(stmt)
-        await session.commit()
+            await session.execute(stmt)
+            await session.commit()
 
-        # TODO: Return True instead to reflect update.
-        # Just need to write & perform tests before changing.
-        return False
+        if error is not None:
+            raise error
+
+        return issues
+
+    async def _update_badges(
+        self,
+        badges: Sequence[GithubBadge],
+        update: Callable[
+            [GithubBadge, GitHub[AppInstallationAuthStrategy]], Awaitable[None]
+        ],
+    ) -> tuple[list[Issue], BaseException | None]:
+        """
+        Run the badge updates on GitHub concurrently.
+
+        Requests follow `crawl_retry`: a primary rate limit fails the remaining
+        updates right away instead of waiting up to an hour for the reset.
+
+        Returns the issues that were updated on GitHub, so they're saved even if
+        others failed, and the first error, to be raised once they're saved.
+        """
+        semaphore = asyncio.Semaphore(BADGE_CONCURRENCY)
+        clients: dict[int, GitHub[AppInstallationAuthStrategy]] = {}
+
+        async def _update(badge: GithubBadge) -> None:
+            async with semaphore:
+                await update(
+                    badge, clients[badge.external_organization.safe_installation_id]
+                )
+
+        async with contextlib.AsyncExitStack() as stack:
+            for badge in badges:
+                installation_id = badge.external_organization.safe_installation_id
+                if installation_id in clients:
+                    continue
+                client = github.get_app_installation_client(
+                    installation_id, auto_retry=crawl_retry
+                )
+                await stack.enter_async_context(client)
+                clients[installation_id] = client
+
+            results = await asyncio.gather(
+                *[_update(badge) for badge in badges], return_exceptions=True
+            )
+
+        issues: list[Issue] = []
+        error: BaseException | None = None
+        for badge, result in zip(badges, results):
+            if result is None:
+                issues.append(badge.issue)
+                continue
+            log.error(
+                "github.issue.badge.failed", issue_id=badge.issue.id, error=str(result)
+            )
+            if error is None:
+                error = result
+        return issues, error
 
     async def update_embed_badge(
         self,
@@ -325,31 +545,238 @@ class GithubIssueService(IssueService):
         log.info("github.sync_issue", issue_id=issue.id)
 
         try:
-            res = await client.rest.issues.async_get(
-                org.name,
-                repo=repo.name,
-                issue_number=issue.number,
-                headers={"If-None-Match": issue.github_issue_etag}
-                if issue.github_issue_etag
-                else {},
-            )
+            res = await self._fetch_issue(client, org, repo, issue)
         except RequestFailed as e:
-            if e.response.status_code == 404:
-                log.info("github.sync_issue.404.marking_as_crawled")
-                issue.github_issue_fetched_at = utc_now()
-                session.add(issue)
-                return
-            elif e.response.status_code == 410:  # 410 Gone, i.e. deleted
-                log.info("github.sync_issue.410.soft_deleting")
-                await self.soft_delete(session, issue.id)
-                return
-            else:
+            if not await self._handle_sync_issue_failure(session, issue, e):
                 raise e
+            return
+
+        await self._handle_sync_issue_response(session, org, repo, issue, res)
+
+    async def sync_issues_batch(
+        self,
+        session: AsyncSession,
+        issues: Sequence[tuple[ExternalOrganization, Repository, Issue]],
+        *,
+        concurrency: int = 16,
+    ) -> None:
+        """
+        Sync several issues at once.
+
+        Requests to GitHub run concurrently, with at most `concurrency` requests in
+        flight per installation. Responses are then applied one by one, as the
+        session doesn't support concurrent operations, and committed every
+        `SYNC_ISSUES_COMMIT_WINDOW` issues.
+
+        Failed requests are retried following `crawl_retry`. Once an installation
+        hits a rate limit we don't wait for, its remaining issues are skipped.
+        They'll be picked up again by the next crawl.
+        """
+        semaphores: dict[int, asyncio.Semaphore] = {}
+        clients: dict[int, GitHub[AppInstallationAuthStrategy]] = {}
+        rate_limited: set[int] = set()
+
+        async def _fetch(
+            org: ExternalOrganization, repo: Repository, issue: Issue
+        ) -> Response[types.Issue] | RequestFailed | None:
+            installation_id = org.safe_installation_id
+            async with semaphores[installation_id]:
+                if installation_id in rate_limited:
+                    return None
+
+                log.info("github.sync_issue", issue_id=issue.id)
+                try:
+                    return await self._fetch_issue(
+                        clients[installation_id], org, repo, issue
+                    )
+                except RateLimitExceeded as e:
+                    log.info(
+                        "github.sync_issue.rate_limited",
+                        installation_id=installation_id,
+                        retry_after=e.retry_after,
+                    )
+                    rate_limited.add(installation_id)
+                    return None
+                except RequestFailed as e:
+                    return e
+                # Network errors, e.g. timeouts: only skip this issue, not the batch
+                except GitHubException as e:
+                    log.error(
+                        "github.sync_issue.failed", issue_id=issue.id, error=str(e)
+                    )
+                    return None
+
+        async with contextlib.AsyncExitStack() as stack:
+            # Entering the client's context makes githubkit reuse a single HTTP
+            # client, and its connection pool, for all the requests of the batch.
+            # Otherwise, each request opens and tears down its own connection.
+            for org, _, _ in issues:
+                installation_id = org.safe_installation_id
+                if installation_id in clients:
+                    continue
+                client = github.get_app_installation_client(
+                    installation_id, auto_retry=crawl_retry
+                )
+                await stack.enter_async_context(client)
+                clients[installation_id] = client
+                semaphores[installation_id] = asyncio.Semaphore(concurrency)
+
+            results = await asyncio.gather(
+                *[_fetch(org, repo, issue) for (org, repo, issue) in issues]
+            )
+
+        # Commit once per window instead of once per issue. Each issue is applied
+        # in a savepoint, so a failure only discards that issue, not the window.
+        # Issues not modified or not found only need to be marked as crawled: that's
+        # done with a single UPDATE per window.
+        # The `issue_upserted` hooks run once the window is committed: some of them
+        # commit on their own, which would end the savepoint and the window.
+        pending = 0
+        crawled: list[UUID] = []
+        upserted: list[Issue] = []
+        for (org, repo, issue), result in zip(issues, results):
+            if result is None:
+                continue
+
+            status_code = (
+                result.response.status_code
+                if isinstance(result, RequestFailed)
+                else result.status_code
+            )
+            if status_code in {304, 404}:
+                log.info(
+                    "github.sync_issue.marking_as_crawled",
+                    issue_id=issue.id,
+                    status_code=status_code,
+                )
+                crawled.append(issue.id)
+            else:
+                stored: Issue | None = None
+                nested = await session.begin_nested()
+                try:
+                    if isinstance(result, RequestFailed):
+                        if not await self._handle_sync_issue_failure(
+                            session, issue, result, autocommit=False
+                        ):
+                            log.error(
+                                "github.sync_issue.failed",
+                                issue_id=issue.id,
+                                status_code=status_code,
+                            )
+                    else:
+                        stored = await self._handle_sync_issue_response(
+                            session, org, repo, issue, result, autocommit=False
+                        )
+                    await nested.commit()
+                except Exception as e:
+                    log.error(
+                        "github.sync_issue.failed", issue_id=issue.id, error=str(e)
+                    )
+                    await nested.rollback()
+                    continue
+                if stored is not None:
+                    upserted.append(stored)
+
+            pending += 1
+            if pending >= SYNC_ISSUES_COMMIT_WINDOW:
+                await self._mark_crawled(session, crawled)
+                crawled = []
+                await session.commit()
+                await self._call_issue_upserted(session, upserted)
+                upserted = []
+                pending = 0
+
+        await self._mark_crawled(session, crawled)
+        await session.commit()
+        await self._call_issue_upserted(session, upserted)
+
+    async def _call_issue_upserted(
+        self, session: AsyncSession, issues: list[Issue]
+    ) -> None:
+        # Hooks are awaited one by one on purpose: they all share `session`, which
+        # doesn't support concurrent operations.
+        for issue in issues:
+            try:
+                await issue_upserted.call(IssueHook(session, issue))
+            except Exception as e:
+                # The issue itself is already saved, don't fail the whole batch
+                log.error(
+                    "github.sync_issue.hooks_failed", issue_id=issue.id, error=str(e)
+                )
+                await session.rollback()
+
+    async def _mark_crawled(self, session: AsyncSession, issue_ids: list[UUID]) -> None:
+        if not issue_ids:
+            return
+
+        await session.execute(
+            sql.update(Issue)
+            .where(Issue.id.in_(issue_ids))
+            .values(github_issue_fetched_at=utc_now())
+        )
+
+    async def _fetch_issue(
+        self,
+        client: GitHub[AppInstallationAuthStrategy],
+        org: ExternalOrganization,
+        repo: Repository,
+        issue: Issue,
+    ) -> Response[types.Issue]:
+        return await client.rest.issues.async_get(
+            org.name,
+            repo=repo.name,
+            issue_number=issue.number,
+            headers={"If-None-Match": issue.github_issue_etag}
+            if issue.github_issue_etag
+            else {},
+        )
 
-        # Cache hit, nothing new
+    async def _handle_sync_issue_failure(
+        self,
+        session: AsyncSession,
+        issue: Issue,
+        e: RequestFailed,
+        autocommit: bool = True,
+    ) -> bool:
+        """
+        Handle the expected failures when fetching an issue.
+
+        Returns False if the failure was not handled.
+        """
+        if e.response.status_code == 404:
+            log.info("github.sync_issue.404.marking_as_crawled")
+            issue.github_issue_fetched_at = utc_now()
+            session.add(issue)
+            return True
+        elif e.response.status_code == 410:  # 410 Gone, i.e. deleted
+            log.info("github.sync_issue.410.soft_deleting")
+            await self.soft_delete(session, issue.id, autocommit=autocommit)
+            return True
+        return False
+
+    async def _handle_sync_issue_response(
+        self,
+        session: AsyncSession,
+        org: ExternalOrganization,
+        repo: Repository,
+        issue: Issue,
+        res: Response[types.Issue],
+        autocommit: bool = True,
+    ) -> Issue | None:
+        """
+        Apply the issue fetched from GitHub.
+
+        Returns the issue if it was upserted. With `autocommit=False`, nothing is
+        committed and the `issue_upserted` hooks are left to the caller.
+        """
+        # Cache hit, nothing new.
+        # Still mark it as crawled, so the crawler moves on to other issues.
+        # The body is parsed lazily by githubkit, so it's never read here.
         if res.status_code == 304:
             log.info("github.sync_issue.etag_cache_hit", issue_id=issue.id)
-            return
+            issue.github_issue_fetched_at = utc_now()
+            session.add(issue)
+            return None
 
         if res.status_code == 200:
             log.info("github.sync_issue.etag_cache_miss", issue_id=issue.id)
@@ -385,9 +812,14 @@ class GithubIssueService(IssueService):
                 )
                 do_upsert = False
 
+            stored = None
             if do_upsert:
-                await self.store(
-                    session, data=res.parsed_data, organization=org, repository=repo
+                stored = await self.store(
+                    session,
+                    data=res.parsed_data,
+                    organization=org,
+                    repository=repo,
+                    autocommit=autocommit,
                 )
 
             # Save etag
@@ -395,67 +827,131 @@ class GithubIssueService(IssueService):
             issue.github_issue_etag = res.headers.get("etag", None)
             session.add(issue)
 
-    async def list_issues_to_crawl_issue(
+            return stored
+
+        return None
+
+    async def claim_issues_to_crawl_issue(
         self,
         session: AsyncSession,
         organization: ExternalOrganization,
     ) -> Sequence[Issue]:
-        current_time = utc_now()
-        cutoff_time = current_time - datetime.timedelta(hours=12)
+        """
+        List the issues to crawl and claim them, so concurrent crawlers don't
+        fetch the same issues.
+
+        Claimed issues get a `github_issue_fetched_at` making them due again in
+        `CRAWL_CLAIM_LEASE`. Syncing them bumps it for real, while issues that
+        couldn't be synced (e.g. rate limited) are crawled again once the lease
+        expires. Rows locked by another crawler are skipped.
+
+        The claim is committed, so it's visible to other crawlers before we start
+        fetching the issues.
+        """
+        candidates = (
+            self._get_issues_to_crawl_issue_statement(organization)
+            .with_only_columns(Issue.id)
+            .with_for_update(of=Issue, skip_locked=True)
+        )
+        stmt = (
+            sql.update(Issue)
+            .where(Issue.id.in_(candidates))
+            .values(
+                github_issue_fetched_at=utc_now() - CRAWL_INTERVAL + CRAWL_CLAIM_LEASE
+            )
+            .returning(Issue)
+            .execution_options(synchronize_session=False)
+        )
+
+        res = await session.execute(stmt)
+        issues = res.scalars().all()
+        await session.commit()
 
+        return issues
+
+    async def list_to_sync(
+        self, session: AsyncSession, ids: Sequence[UUID]
+    ) -> Sequence[Issue]:
+        """
+        List the given issues that can still be synced, along with their
+        organization and repository.
+        """
         stmt = (
             sql.select(Issue)
             .join(Issue.organization)
             .join(Issue.repository)
             .where(
-                or_(
-                    Issue.github_issue_fetched_at.is_(None),
-                    Issue.github_issue_fetched_at < cutoff_time,
-                ),
+                Issue.id.in_(ids),
                 Issue.deleted_at.is_(None),
                 ExternalOrganization.deleted_at.is_(None),
                 Repository.deleted_at.is_(None),
                 ExternalOrganization.installation_id.is_not(None),
-                ExternalOrganization.id == organization.id,
             )
-            .order_by(asc(Issue.github_issue_fetched_at))
-            .limit(100)
+            .options(
+                contains_eager(Issue.organization), contains_eager(Issue.repository)
+            )
         )
 
         res = await session.execute(stmt)
 
-        return res.scalars().unique().all()
+        # Organization and repository are many-to-one: rows are already unique.
+        return res.scalars().all()
+
+    def _get_issues_to_crawl_issue_statement(
+        self, organization: ExternalOrganization
+    ) -> Select[tuple[Issue]]:
+        cutoff_time = utc_now() - CRAWL_INTERVAL
+
+        return (
+            sql.select(Issue)
+            .join(Issue.organization)
+            .join(Issue.repository)
+            .where(
+                func.coalesce(Issue.github_issue_fetched_at, NEVER_FETCHED)
+                < cutoff_time,
+                Issue.deleted_at.is_(None),
+                ExternalOrganization.deleted_at.is_(None),
+                Repository.deleted_at.is_(None),
+                ExternalOrganization.installation_id.is_not(None),
+                ExternalOrganization.id == organization.id,
+            )
+            .order_by(asc(func.coalesce(Issue.github_issue_fetched_at, NEVER_FETCHED)))
+            .limit(100)
+        )
 
     async def list_issues_to_crawl_timeline(
         self,
         session: AsyncSession,
         organization: ExternalOrganization,
     ) -> Sequence[Issue]:
-        current_time = utc_now()
-        cutoff_time = current_time - datetime.timedelta(hours=12)
+        cutoff_time = utc_now() - CRAWL_INTERVAL
 
         stmt = (
             sql.select(Issue)
             .join(Issue.organization)
             .join(Issue.repository)
             .where(
-                or_(
-                    Issue.github_timeline_fetched_at.is_(None),
-                    Issue.github_timeline_fetched_at < cutoff_time,
-                ),
+                func.coalesce(Issue.github_timeline_fetched_at, NEVER_FETCHED)
+                < cutoff_time,
                 Issue.deleted_at.is_(None),
                 ExternalOrganization.deleted_at.is_(None),
                 Repository.deleted_at.is_(None),
                 ExternalOrganization.installation_id.is_not(None),
                 ExternalOrganization.id == organization.id,
             )
-            .order_by(asc(Issue.github_timeline_fetched_at))
+            .order_by(
+                asc(func.coalesce(Issue.github_timeline_fetched_at, NEVER_FETCHED))
+            )
             .limit(100)
+            .options(
+                contains_eager(Issue.organization), contains_eager(Issue.repository)
+            )
         )
 
         res = await session.execute(stmt)
 
-        return res.scalars().unique().all()
+        # Organization and repository are many-to-one: rows are already unique.
+        return res.scalars().all()
 
     async def list_issues_to_add_badge_to_auto(
         self,
@@ -463,6 +959,11 @@ class GithubIssueService(IssueService):
         external_organization: ExternalOrganization,
         repository: Repository,
     ) -> Sequence[Issue]:
+        # No issue of the repository can get a badge, skip listing them
+        (can_embed, _) = GithubBadge.can_embed_on_organization(external_organization)
+        if not can_embed or not repository.pledge_badge_auto_embed:
+            return []
+
         (issues, _) = await self.list_by_repository_type_and_status(
             session=session,
             repository_ids=[repository.id],
@@ -488,6 +989,11 @@ class GithubIssueService(IssueService):
         external_organization: ExternalOrganization,
         repository: Repository,
     ) -> Sequence[Issue]:
+        # No issue of the repository can have its badge removed, skip listing them
+        (can_embed, _) = GithubBadge.can_embed_on_organization(external_organization)
+        if not can_embed:
+            return []
+
         (issues, _) = await self.list_by_repository_type_and_status(
             session=session,
             repository_ids=[repository.id],
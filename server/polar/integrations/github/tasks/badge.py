@@ -1,9 +1,12 @@
+import datetime
+from collections.abc import Sequence
 from uuid import UUID
 
 import httpx
 import structlog
 from arq import Retry
 
+from polar.models import Issue
 from polar.worker import (
     AsyncSessionMaker,
     JobContext,
@@ -12,6 +15,7 @@ from polar.worker import (
     task,
 )
 
+from ..badge import GithubBadge
 from ..service.issue import github_issue
 from .utils import get_external_organization_and_repo, github_rate_limit_retry
 
@@ -19,6 +23,11 @@ log = structlog.get_logger()
 
 BADGE_UPDATE_MAX_RETRIES = 5
 
+# Issues of a repository get their badge updated by jobs of this many issues,
+# so a job is short and a failure only retries its own issues
+BADGE_BATCH_SIZE = 25
+BADGE_BATCH_TIMEOUT = datetime.timedelta(minutes=10)
+
 
 @task("github.badge.embed_on_issue")
 @github_rate_limit_retry
@@ -162,12 +171,18 @@ async def embed_badge_retroactively_on_repository(
                 )
                 return
 
-            for i in await github_issue.list_issues_to_add_badge_to_auto(
+            issues = await github_issue.list_issues_to_add_badge_to_auto(
                 session=session,
                 repository=repository,
                 external_organization=organization,
-            ):
-                enqueue_job("github.badge.embed_on_issue", i.id)
+            )
+            for numbers in _chunk_numbers(issues):
+                enqueue_job(
+                    "github.badge.embed_on_issues",
+                    organization_id,
+                    repository_id,
+                    numbers,
+                )
 
 
 @task("github.badge.remove_on_repository")
@@ -188,9 +203,111 @@ async def remove_badges_on_repository(
                 log.warn("github.remove_badges_on_repository.skip_repo_is_private")
                 return
 
-            for i in await github_issue.list_issues_to_remove_badge_from_auto(
+            issues = await github_issue.list_issues_to_remove_badge_from_auto(
                 session=session,
                 repository=repository,
                 external_organization=organization,
-            ):
-                enqueue_job("github.badge.remove_on_issue", i.id)
+            )
+            for numbers in _chunk_numbers(issues):
+                enqueue_job(
+                    "github.badge.remove_on_issues",
+                    organization_id,
+                    repository_id,
+                    numbers,
+                )
+
+
+# If a batch job is interrupted, e.g. by its timeout, badges already updated on
+# GitHub may not be saved yet. They're saved by the next run: updating a badge
+# that's already in the wanted state is a no-op that counts as a success.
+@task("github.badge.embed_on_issues", timeout=BADGE_BATCH_TIMEOUT)
+@github_rate_limit_retry
+async def embed_badge_batch(
+    ctx: JobContext,
+    organization_id: UUID,
+    repository_id: UUID,
+    issue_numbers: list[int],
+    polar_context: PolarWorkerContext,
+) -> None:
+    with polar_context.to_execution_context():
+        async with AsyncSessionMaker(ctx) as session:
+            (
+                external_organization,
+                repository,
+            ) = await get_external_organization_and_repo(
+                session, organization_id, repository_id
+            )
+            issues = await github_issue.list_by_repository_and_numbers(
+                session, repository.id, issue_numbers
+            )
+
+            try:
+                await github_issue.embed_badge_many(
+                    session,
+                    badges=[
+                        GithubBadge(
+                            external_organization=external_organization,
+                            repository=repository,
+                            issue=issue,
+                            organization=external_organization.safe_organization,
+                        )
+                        for issue in issues
+                    ],
+                    triggered_from_label=False,
+                )
+            except httpx.HTTPError as e:
+                # Issues already updated are saved, so they're left out of the retry
+                if ctx["job_try"] <= BADGE_UPDATE_MAX_RETRIES:
+                    raise Retry(2 ** ctx["job_try"]) from e
+                else:
+                    raise
+
+
+@task("github.badge.remove_on_issues", timeout=BADGE_BATCH_TIMEOUT)
+@github_rate_limit_retry
+async def remove_badge_batch(
+    ctx: JobContext,
+    organization_id: UUID,
+    repository_id: UUID,
+    issue_numbers: list[int],
+    polar_context: PolarWorkerContext,
+) -> None:
+    with polar_context.to_execution_context():
+        async with AsyncSessionMaker(ctx) as session:
+            (
+                external_organization,
+                repository,
+            ) = await get_external_organization_and_repo(
+                session, organization_id, repository_id
+            )
+            issues = await github_issue.list_by_repository_and_numbers(
+                session, repository.id, issue_numbers
+            )
+
+            try:
+                await github_issue.remove_badge_many(
+                    session,
+                    badges=[
+                        GithubBadge(
+                            external_organization=external_organization,
+                            repository=repository,
+                            issue=issue,
+                            organization=external_organization.safe_organization,
+                        )
+                        for issue in issues
+                    ],
+                    triggered_from_label=False,
+                )
+            except httpx.HTTPError as e:
+                if ctx["job_try"] <= BADGE_UPDATE_MAX_RETRIES:
+                    raise Retry(2 ** ctx["job_try"]) from e
+                else:
+                    raise
+
+
+def _chunk_numbers(issues: Sequence[Issue]) -> list[list[int]]:
+    numbers = [issue.number for issue in issues]
+    return [
+        numbers[i : i + BADGE_BATCH_SIZE]
+        for i in range(0, len(numbers), BADGE_BATCH_SIZE)
+    ]
@@ -1,11 +1,14 @@
+import datetime
 import random
 from uuid import UUID
 
 import structlog
+from arq.jobs import Job, JobStatus
 
 from polar.integrations.github import service
 from polar.integrations.github.client import get_app_installation_client
 from polar.locker import Locker
+from polar.models import ExternalOrganization, Issue, Repository
 from polar.redis import get_redis
 from polar.worker import (
     AsyncSessionMaker,
@@ -24,6 +27,9 @@ from .utils import get_external_organization_and_repo, github_rate_limit_retry
 
 log = structlog.get_logger()
 
+# Syncing a batch can wait on secondary rate limits, see `crawl_retry`
+SYNC_BATCH_TIMEOUT = datetime.timedelta(minutes=15)
+
 
 @task("github.issue.sync")
 @github_rate_limit_retry
@@ -125,6 +131,60 @@ async def issue_sync_issue_dependencies(
             )
 
 
+# Results aren't kept: a batch job id is reused by the next crawl of the organization
+@task("github.issue.sync.batch", timeout=SYNC_BATCH_TIMEOUT, keep_result=0)
+async def issue_sync_batch(
+    ctx: JobContext,
+    issue_ids: list[UUID],
+    polar_context: PolarWorkerContext,
+) -> None:
+    with polar_context.to_execution_context():
+        async with AsyncSessionMaker(ctx) as session:
+            issues = await github_issue.list_to_sync(session, issue_ids)
+
+            has_rate_limit: dict[int, bool] = {}
+            to_sync: list[tuple[ExternalOrganization, Repository, Issue]] = []
+            for issue in issues:
+                org = issue.organization
+                installation_id = org.safe_installation_id
+                if installation_id not in has_rate_limit:
+                    has_rate_limit[installation_id] = await _has_crawl_rate_limit(org)
+                if has_rate_limit[installation_id]:
+                    to_sync.append((org, issue.repository, issue))
+
+            log.info(
+                "github.issue.sync.batch",
+                found_count=len(issues),
+                sync_count=len(to_sync),
+            )
+
+            if to_sync:
+                await github_issue.sync_issues_batch(session, to_sync)
+
+
+async def _has_crawl_rate_limit(org: ExternalOrganization) -> bool:
+    client = get_app_installation_client(org.safe_installation_id)
+    try:
+        rate_limit = await github_api.get_rate_limit(client)
+    except Exception as e:
+        log.info(
+            "failed to get rate limit, treating it as no remaining",
+            org_name=org.name,
+            err=e,
+        )
+        return False
+
+    if rate_limit.remaining < 1000:
+        log.info(
+            "github.issue.sync.batch.rate_limit_almost_exhausted",
+            org_name=org.name,
+            rate_limit_remaining=rate_limit.remaining,
+        )
+        return False
+
+    return True
+
+
 @interval(
     minute={
         2,
@@ -136,54 +196,53 @@ async def issue_sync_issue_dependencies(
     },
     second=0,
 )
-@github_rate_limit_retry
 async def cron_refresh_issues(ctx: JobContext) -> None:
     async with AsyncSessionMaker(ctx) as session:
         orgs = await github_organization_service.list_installed(session)
         for org in orgs:
-            issues = await github_issue.list_issues_to_crawl_issue(session, org)
-            if len(issues) == 0:
+            # The previous batch hasn't run yet, e.g. because the crawl queue is
+            # backed up. Don't claim more issues: once their claim expires, the
+            # issues it holds would be claimed and fetched a second time.
+            job_id = _get_sync_batch_job_id(org)
+            if await _is_job_pending(ctx, job_id, QueueName.github_crawl):
                 log.info(
-                    "github.issue.sync.cron_refresh_issues",
+                    "github.issue.sync.cron_refresh_issues.batch_pending",
                     org_name=org.name,
-                    found_count=len(issues),
                 )
                 continue
 
-            client = get_app_installation_client(org.safe_installation_id)
-            try:
-                rate_limit = await github_api.get_rate_limit(client)
-            except Exception as e:
-                log.info(
-                    "failed to get rate limit, treating it as no remaining",
-                    org_name=org.name,
-                    err=e,
-                )
-                continue
-
-            if rate_limit.remaining < 1000:
-                log.info(
-                    "github.issue.sync.cron_refresh_issues.rate_limit_almost_exhausted",
-                    org_name=org.name,
-                    rate_limit_remaining=rate_limit.remaining,
-                )
+            if not await _has_crawl_rate_limit(org):
                 continue
 
+            # Claimed issues that don't get synced, e.g. because of the rate
+            # limit, are picked up again once their claim expires.
+            issues = await github_issue.claim_issues_to_crawl_issue(session, org)
             log.info(
                 "github.issue.sync.cron_refresh_issues",
                 org_name=org.name,
                 found_count=len(issues),
-                rate_limit_remaining=rate_limit.remaining,
+            )
+            if len(issues) == 0:
+                continue
+
+            # Installations are unique per organization: that's one job per
+            # installation. They're crawled in parallel, each within its own rate
+            # limit, and don't fail or time out together.
+            enqueue_job(
+                "github.issue.sync.batch",
+                [issue.id for issue in issues],
+                _job_id=job_id,
+                queue_name=QueueName.github_crawl,
             )
 
-            for issue in issues:
-                enqueue_job(
-                    "github.issue.sync",
-                    issue.id,
-                    _job_id=f"github.issue.sync:{issue.id}",
-                    _defer_by=random.randint(0, 60 * 5),
-                    queue_name=QueueName.github_crawl,
-                )
+
+def _get_sync_batch_job_id(org: ExternalOrganization) -> str:
+    return f"github.issue.sync.batch:{org.id}"
+
+
+async def _is_job_pending(ctx: JobContext, job_id: str, queue_name: QueueName) -> bool:
+    status = await Job(job_id, ctx["redis"], _queue_name=queue_name.value).status()
+    return status in {JobStatus.deferred, JobStatus.queued, JobStatus.in_progress}
 
 
 @interval(
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Annotated, Any, Self
+from typing import Annotated, Any, Self, TypeAlias, cast
 from uuid import UUID
 
 from pydantic import BeforeValidator, ConfigDict, Field, HttpUrl
@@ -32,6 +32,17 @@ from polar.models.repository import Repository as RepositoryModel
 from polar.repository.schemas import Repository
 from polar.types import JSONAny
 
+# Issue payloads of the GitHub API and webhooks
+GitHubIssue: TypeAlias = (
+    types.Issue
+    | types.WebhookIssuesOpenedPropIssue
+    | types.WebhookIssuesEditedPropIssue
+    | types.WebhookIssuesClosedPropIssue
+    | types.WebhookIssuesReopenedPropIssue
+    | types.WebhookIssuesDeletedPropIssue
+    | types.WebhookIssuesTransferredPropChangesPropNewIssue
+)
+
 
 # Public API
 class Reactions(Schema):
@@ -221,7 +232,27 @@ class IssueAndPullRequestBase(Base):
         """
         normalizes both issues and pull requests
         """
+        return cls(
+            **cls._get_normalized_github_issue_fields(data, organization, repository)
+        )
 
+    @classmethod
+    def _get_normalized_github_issue_fields(
+        cls,
+        data: types.Issue
+        | types.WebhookIssuesOpenedPropIssue
+        | types.WebhookIssuesEditedPropIssue
+        | types.WebhookIssuesClosedPropIssue
+        | types.WebhookIssuesReopenedPropIssue
+        | types.WebhookIssuesDeletedPropIssue
+        | types.WebhookIssuesTransferredPropChangesPropNewIssue
+        | types.PullRequest
+        | types.PullRequestSimple
+        | types.WebhookPullRequestSynchronizePropPullRequest
+        | types.PullRequestWebhook,
+        organization: ExternalOrganizationModel,
+        repository: RepositoryModel,
+    ) -> dict[str, Any]:
         if not data.id:
             raise Exception("no external id set")
 
@@ -265,7 +296,7 @@ class IssueAndPullRequestBase(Base):
                 else:
                     labels.append(label.model_dump(mode="json"))
 
-        return cls(
+        return dict(
             platform=Platforms.github,
             external_id=data.id,
             organization_id=organization.id,
@@ -308,33 +339,61 @@ class IssueCreate(IssueAndPullRequestBase):
     @classmethod
     def from_github(
         cls,
-        data: types.Issue
-        | types.WebhookIssuesOpenedPropIssue
-        | types.WebhookIssuesEditedPropIssue
-        | types.WebhookIssuesClosedPropIssue
-        | types.WebhookIssuesReopenedPropIssue
-        | types.WebhookIssuesDeletedPropIssue
-        | types.WebhookIssuesTransferredPropChangesPropNewIssue,
+        data: GitHubIssue,
+        organization: ExternalOrganizationModel,
+        repository: RepositoryModel,
+    ) -> Self:
+        ret = cls.get_normalized_github_issue(data, organization, repository)
+        return ret._set_github_derived_fields(data, organization, repository)
+
+    @classmethod
+    def from_github_fast(
+        cls: type[Self],
+        data: GitHubIssue,
         organization: ExternalOrganizationModel,
         repository: RepositoryModel,
     ) -> Self:
-        ret = super().get_normalized_github_issue(data, organization, repository)
+        """
+        Same as `from_github`, but skips validation.
+
+        Only use it with data already validated by githubkit: every field is then
+        built with the right type, and validating it again is wasted work.
+        """
+        # The pydantic mypy plugin types `model_construct` as returning the class
+        # it's defined on, not the subclass it's called on
+        ret = cast(
+            Self,
+            cls.model_construct(
+                **cls._get_normalized_github_issue_fields(
+                    data, organization, repository
+                )
+            ),
+        )
+        return ret._set_github_derived_fields(data, organization, repository)
 
-        ret.external_lookup_key = f"{organization.name}/{repository.name}/{data.number}"
+    def _set_github_derived_fields(
+        self,
+        data: GitHubIssue,
+        organization: ExternalOrganizationModel,
+        repository: RepositoryModel,
+    ) -> Self:
+        self.external_lookup_key = (
+            f"{organization.name}/{repository.name}/{data.number}"
+        )
 
-        ret.has_pledge_badge_label = IssueModel.contains_pledge_badge_label(
-            ret.labels, repository.pledge_badge_label
+        self.has_pledge_badge_label = IssueModel.contains_pledge_badge_label(
+            self.labels, repository.pledge_badge_label
         )
 
-        if ret.body and GithubBadge.badge_is_embedded(ret.body):
-            ret.pledge_badge_embedded_at = ret.issue_modified_at
+        if self.body and GithubBadge.badge_is_embedded(self.body):
+            self.pledge_badge_embedded_at = self.issue_modified_at
 
         # this is not good, we're risking setting positive_reactions_count to 0 if the
         # payload is missing
         # TODO: only update if payload actually is set
         if data.reactions:
             # excluding: confused, minus_one
-            ret.positive_reactions_count = (
+            self.positive_reactions_count = (
                 data.reactions.plus_one
                 + data.reactions.laugh
                 + data.reactions.heart
@@ -343,9 +402,9 @@ class IssueCreate(IssueAndPullRequestBase):
                 + data.reactions.rocket
             )
 
-            ret.total_engagement_count = data.reactions.total_count + data.comments
+            self.total_engagement_count = data.reactions.total_count + data.comments
 
-        return ret
+        return self
 
 
 class IssueUpdate(IssueCreate): ...
@@ -46,7 +46,9 @@ class ResourceServiceReader(
         res = await session.execute(query)
         return res.scalars().unique().one_or_none()
 
-    async def soft_delete(self, session: AsyncSession, id: UUID) -> None:
+    async def soft_delete(
+        self, session: AsyncSession, id: UUID, autocommit: bool = True
+    ) -> None:
         stmt = (
             sql.update(self.model)
             .where(self.model.id == id, self.model.deleted_at.is_(None))
@@ -55,7 +57,8 @@ class ResourceServiceReader(
             )
         )
         await session.execute(stmt)
-        await session.commit()
+        if autocommit:
+            await session.commit()
 
 
 class ResourceService(
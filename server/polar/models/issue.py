@@ -8,6 +8,7 @@ from sqlalchemy import (
     TIMESTAMP,
     BigInteger,
     Boolean,
+    Column,
     ColumnElement,
     ForeignKey,
     Index,
@@ -16,6 +17,9 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     Uuid,
+    func,
+    literal_column,
+    text,
     type_coerce,
 )
 from sqlalchemy.dialects.postgresql import JSONB
@@ -162,6 +166,26 @@ class Issue(IssueFields, RecordModel):
             "total_engagement_count",
             "created_at",
         ),
+        # Crawl indexes, see `claim_issues_to_crawl_issue` and
+        # `list_issues_to_crawl_timeline`
+        Index(
+            "ix_issues_crawl_issue",
+            "organization_id",
+            func.coalesce(
+                Column("github_issue_fetched_at"),
+                literal_column("'-infinity'::timestamptz"),
+            ),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_issues_crawl_timeline",
+            "organization_id",
+            func.coalesce(
+                Column("github_timeline_fetched_at"),
+                literal_column("'-infinity'::timestamptz"),
+            ),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
     )
 
     TRANSFERRABLE_PROPERTIES: ClassVar[set[str]] = {
@@ -9,6 +9,7 @@ from httpx import AsyncClient
 from polar.app import app
 from polar.auth.dependencies import get_auth_subject
 from polar.auth.models import AuthSubject, Subject
+from polar.integrations.github import cache as github_cache
 from polar.postgres import AsyncSession, get_db_session
 
 # We used to use anyio, but it was causing garbage collection issues
@@ -28,6 +29,14 @@ def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_github_cache() -> Generator[None, None, None]:
+    # The in-process cache of GitHub tokens would leak them from a test to another
+    github_cache._local_cache.clear()
+    yield
+    github_cache._local_cache.clear()
+
+
 @pytest_asyncio.fixture
 async def client(
     request: pytest.FixtureRequest,
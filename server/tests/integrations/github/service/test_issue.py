@@ -1,8 +1,38 @@
+import datetime
+from typing import Any
+from uuid import UUID
+
+import httpx
 import pytest
+from githubkit import Response
+from githubkit.exception import (
+    PrimaryRateLimitExceeded,
+    RequestFailed,
+    RequestTimeout,
+    SecondaryRateLimitExceeded,
+)
+from pytest_mock import MockerFixture
 
+from polar.integrations.github import types
 from polar.integrations.github.client import get_client
-from polar.integrations.github.service.issue import github_issue
+from polar.integrations.github.service.issue import crawl_retry, github_issue
+from polar.kit.utils import utc_now
+from polar.models.external_organization import ExternalOrganization
+from polar.models.repository import Repository
 from polar.postgres import AsyncSession
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import create_issue
+from tests.fixtures.vcr import read_cassette
+
+
+def github_response(status_code: int) -> Response[Any]:
+    return Response(
+        httpx.Response(
+            status_code,
+            request=httpx.Request("GET", "https://api.github.com/"),
+        ),
+        Any,
+    )
 
 
 @pytest.mark.asyncio
@@ -35,3 +65,430 @@ async def test_sync_external_org_with_repo_and_issue(
     )
 
     assert issue is not None
+
+
+@pytest.mark.asyncio
+async def test_sync_issues_batch(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    mocker.patch(
+        "polar.integrations.github.service.issue.github.get_app_installation_client"
+    )
+
+    not_modified = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    not_found = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    responses: dict[UUID, Response[Any] | RequestFailed] = {
+        not_modified.id: github_response(304),
+        not_found.id: RequestFailed(github_response(404)),
+    }
+
+    async def fetch_issue(*args: Any) -> Response[Any]:
+        response = responses[args[-1].id]
+        if isinstance(response, RequestFailed):
+            raise response
+        return response
+
+    mocker.patch.object(github_issue, "_fetch_issue", side_effect=fetch_issue)
+
+    # then
+    session.expunge_all()
+
+    await github_issue.sync_issues_batch(
+        session,
+        [
+            (external_organization_linked, repository_linked, not_modified),
+            (external_organization_linked, repository_linked, not_found),
+        ],
+    )
+
+    updated_not_modified = await github_issue.get(session, not_modified.id)
+    assert updated_not_modified is not None
+    assert updated_not_modified.github_issue_fetched_at is not None
+
+    updated_not_found = await github_issue.get(session, not_found.id)
+    assert updated_not_found is not None
+    assert updated_not_found.github_issue_fetched_at is not None
+
+
+@pytest.mark.asyncio
+async def test_sync_issues_batch_updated(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    # Run the hooks registered in production, some of them commit on their own
+    import polar.receivers  # noqa: F401
+
+    mocker.patch("polar.receivers.onboarding.publish")
+    enqueue_job_mock = mocker.patch("polar.integrations.github.receivers.enqueue_job")
+    mocker.patch(
+        "polar.integrations.github.service.issue.github.get_app_installation_client"
+    )
+
+    updated = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    not_modified = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    payload = read_cassette("github/webhooks/issues.opened_with_polar_label.json")[
+        "body"
+    ]["issue"]
+    payload.update(
+        id=updated.external_id,
+        number=updated.number,
+        state="open",
+        title="Updated title",
+    )
+    responses: dict[UUID, Response[Any]] = {
+        updated.id: Response(
+            httpx.Response(
+                200,
+                json=payload,
+                headers={"etag": '"ETAG"'},
+                request=httpx.Request("GET", "https://api.github.com/"),
+            ),
+            types.Issue,
+        ),
+        not_modified.id: github_response(304),
+    }
+
+    async def fetch_issue(*args: Any) -> Response[Any]:
+        return responses[args[-1].id]
+
+    mocker.patch.object(github_issue, "_fetch_issue", side_effect=fetch_issue)
+
+    # then
+    session.expunge_all()
+
+    # As in the crawl, issues are loaded in the session they're synced with
+    to_sync = await github_issue.list_to_sync(session, [updated.id, not_modified.id])
+    await github_issue.sync_issues_batch(
+        session, [(issue.organization, issue.repository, issue) for issue in to_sync]
+    )
+
+    # Hooks ran for the upserted issue
+    enqueued = [call.args for call in enqueue_job_mock.call_args_list]
+    assert ("github.issue.sync.issue_references", updated.id) in enqueued
+
+    session.expunge_all()
+
+    updated_issue = await github_issue.get(session, updated.id)
+    assert updated_issue is not None
+    assert updated_issue.title == "Updated title"
+    assert updated_issue.github_issue_etag == '"ETAG"'
+    assert updated_issue.github_issue_fetched_at is not None
+
+    updated_not_modified = await github_issue.get(session, not_modified.id)
+    assert updated_not_modified is not None
+    assert updated_not_modified.github_issue_fetched_at is not None
+
+
+@pytest.mark.asyncio
+async def test_sync_issues_batch_rate_limited(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    mocker.patch(
+        "polar.integrations.github.service.issue.github.get_app_installation_client"
+    )
+    fetch_mock = mocker.patch.object(
+        github_issue,
+        "_fetch_issue",
+        side_effect=SecondaryRateLimitExceeded(
+            github_response(403), datetime.timedelta(seconds=60)
+        ),
+    )
+
+    issues = [
+        await create_issue(
+            save_fixture, external_organization_linked, repository_linked
+        )
+        for _ in range(3)
+    ]
+
+    # then
+    session.expunge_all()
+
+    await github_issue.sync_issues_batch(
+        session,
+        [(external_organization_linked, repository_linked, issue) for issue in issues],
+        concurrency=1,
+    )
+
+    # Remaining issues of the installation are skipped after the first rate limit
+    assert fetch_mock.call_count == 1
+    for issue in issues:
+        updated_issue = await github_issue.get(session, issue.id)
+        assert updated_issue is not None
+        assert updated_issue.github_issue_fetched_at is None
+
+
+@pytest.mark.asyncio
+async def test_sync_issues_batch_request_timeout(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    mocker.patch(
+        "polar.integrations.github.service.issue.github.get_app_installation_client"
+    )
+
+    timed_out = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    not_modified = [
+        await create_issue(
+            save_fixture, external_organization_linked, repository_linked
+        )
+        for _ in range(2)
+    ]
+
+    async def fetch_issue(*args: Any) -> Response[Any]:
+        if args[-1].id == timed_out.id:
+            raise RequestTimeout(httpx.Request("GET", "https://api.github.com/"))
+        return github_response(304)
+
+    mocker.patch.object(github_issue, "_fetch_issue", side_effect=fetch_issue)
+
+    # then
+    session.expunge_all()
+
+    await github_issue.sync_issues_batch(
+        session,
+        [
+            (external_organization_linked, repository_linked, issue)
+            for issue in [timed_out, *not_modified]
+        ],
+    )
+
+    updated_timed_out = await github_issue.get(session, timed_out.id)
+    assert updated_timed_out is not None
+    assert updated_timed_out.github_issue_fetched_at is None
+
+    for issue in not_modified:
+        updated_issue = await github_issue.get(session, issue.id)
+        assert updated_issue is not None
+        assert updated_issue.github_issue_fetched_at is not None
+
+
+@pytest.mark.asyncio
+async def test_claim_issues_to_crawl_issue(
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    never_fetched = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    stale = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    stale.github_issue_fetched_at = utc_now() - datetime.timedelta(days=1)
+    await save_fixture(stale)
+
+    fresh = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    fresh.github_issue_fetched_at = utc_now()
+    await save_fixture(fresh)
+
+    # then
+    session.expunge_all()
+
+    issues = await github_issue.claim_issues_to_crawl_issue(
+        session, external_organization_linked
+    )
+    assert {issue.id for issue in issues} == {never_fetched.id, stale.id}
+    assert all(issue.github_issue_fetched_at is not None for issue in issues)
+
+    # Claimed issues are skipped by the next crawls
+    assert (
+        await github_issue.claim_issues_to_crawl_issue(
+            session, external_organization_linked
+        )
+        == []
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_issues_batch_failure_isolated(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    mocker.patch(
+        "polar.integrations.github.service.issue.github.get_app_installation_client"
+    )
+    mocker.patch.object(
+        github_issue,
+        "_fetch_issue",
+        side_effect=RequestFailed(github_response(410)),
+    )
+
+    failing = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    succeeding = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    failing_id = failing.id
+    handle_sync_issue_failure = github_issue._handle_sync_issue_failure
+
+    async def handle_failure(*args: Any, **kwargs: Any) -> bool:
+        handled = await handle_sync_issue_failure(*args, **kwargs)
+        if args[1] is failing:
+            raise Exception("unexpected")
+        return handled
+
+    mocker.patch.object(
+        github_issue, "_handle_sync_issue_failure", side_effect=handle_failure
+    )
+
+    # then
+    session.expunge_all()
+
+    await github_issue.sync_issues_batch(
+        session,
+        [
+            (external_organization_linked, repository_linked, failing),
+            (external_organization_linked, repository_linked, succeeding),
+        ],
+    )
+
+    session.expunge_all()
+
+    updated_failing = await github_issue.get(session, failing_id, allow_deleted=True)
+    assert updated_failing is not None
+    assert updated_failing.deleted_at is None
+
+    updated_succeeding = await github_issue.get(
+        session, succeeding.id, allow_deleted=True
+    )
+    assert updated_succeeding is not None
+    assert updated_succeeding.deleted_at is not None
+
+
+@pytest.mark.asyncio
+async def test_store_unchanged(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    upserted_mock = mocker.patch(
+        "polar.integrations.github.service.issue.issue_upserted.call"
+    )
+    data = types.Issue.model_validate(
+        read_cassette("github/webhooks/issues.opened_with_polar_label.json")["body"][
+            "issue"
+        ]
+    )
+
+    # then
+    session.expunge_all()
+
+    stored = await github_issue.store(
+        session,
+        data=data,
+        organization=external_organization_linked,
+        repository=repository_linked,
+    )
+    assert stored is not None
+    assert upserted_mock.call_count == 1
+
+    # Storing the same payload again is a no-op
+    unchanged = await github_issue.store(
+        session,
+        data=data,
+        organization=external_organization_linked,
+        repository=repository_linked,
+    )
+    assert unchanged is stored
+    assert upserted_mock.call_count == 1
+
+    # A changed payload is stored
+    changed = await github_issue.store(
+        session,
+        data=data.model_copy(update={"title": "Updated title"}),
+        organization=external_organization_linked,
+        repository=repository_linked,
+    )
+    assert changed is not None
+    assert changed.title == "Updated title"
+    assert upserted_mock.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_store_many_order(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    mocker.patch("polar.integrations.github.service.issue.issue_upserted.call")
+    data = types.Issue.model_validate(
+        read_cassette("github/webhooks/issues.opened_with_polar_label.json")["body"][
+            "issue"
+        ]
+    )
+    other_data = data.model_copy(update={"id": data.id + 1, "number": data.number + 1})
+
+    # then
+    session.expunge_all()
+
+    await github_issue.store(
+        session,
+        data=data,
+        organization=external_organization_linked,
+        repository=repository_linked,
+    )
+
+    # The new issue is written, the other one is unchanged
+    stored = await github_issue.store_many(
+        session,
+        data=[other_data, data],
+        organization=external_organization_linked,
+        repository=repository_linked,
+    )
+    assert [issue.external_id for issue in stored] == [other_data.id, data.id]
+
+
+def test_crawl_retry() -> None:
+    retry_after = datetime.timedelta(seconds=60)
+
+    secondary = SecondaryRateLimitExceeded(github_response(403), retry_after)
+    assert crawl_retry(secondary, 0) == (True, retry_after)
+    assert crawl_retry(secondary, 1) == (True, retry_after * 2)
+    assert crawl_retry(secondary, 2).do_retry is False
+
+    primary = PrimaryRateLimitExceeded(github_response(403), retry_after)
+    assert crawl_retry(primary, 0).do_retry is False
+
+    server_error = RequestFailed(github_response(502))
+    assert crawl_retry(server_error, 0).do_retry is True
+
+    not_found = RequestFailed(github_response(404))
+    assert crawl_retry(not_found, 0).do_retry is False
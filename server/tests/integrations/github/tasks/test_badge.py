@@ -0,0 +1,219 @@
+import datetime
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from arq import Retry
+from githubkit import Response
+from githubkit.exception import PrimaryRateLimitExceeded
+from pytest_mock import MockerFixture
+
+from polar.integrations.github.badge import GithubBadge
+from polar.integrations.github.service.issue import crawl_retry, github_issue
+from polar.integrations.github.tasks.badge import (
+    embed_badge_batch,
+    embed_badge_retroactively_on_repository,
+    remove_badge_batch,
+    remove_badges_on_repository,
+)
+from polar.models.external_organization import ExternalOrganization
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from polar.worker import JobContext, PolarWorkerContext
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import create_issue
+
+
+@pytest.mark.asyncio
+async def test_embed_badge_retroactively_on_repository(
+    mocker: MockerFixture,
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    mocker.patch("polar.integrations.github.tasks.badge.BADGE_BATCH_SIZE", 2)
+    enqueue_job_mock = mocker.patch("polar.integrations.github.tasks.badge.enqueue_job")
+
+    issues = [
+        await create_issue(
+            save_fixture, external_organization_linked, repository_linked
+        )
+        for _ in range(3)
+    ]
+    mocker.patch.object(
+        github_issue,
+        "list_issues_to_add_badge_to_auto",
+        new=AsyncMock(return_value=issues),
+    )
+
+    # then
+    session.expunge_all()
+
+    await embed_badge_retroactively_on_repository(
+        job_context,
+        external_organization_linked.id,
+        repository_linked.id,
+        polar_worker_context,
+    )
+
+    # Issues are updated by batch jobs, not inline
+    assert [call.args for call in enqueue_job_mock.call_args_list] == [
+        (
+            "github.badge.embed_on_issues",
+            external_organization_linked.id,
+            repository_linked.id,
+            [issues[0].number, issues[1].number],
+        ),
+        (
+            "github.badge.embed_on_issues",
+            external_organization_linked.id,
+            repository_linked.id,
+            [issues[2].number],
+        ),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_remove_badges_on_repository(
+    mocker: MockerFixture,
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    enqueue_job_mock = mocker.patch("polar.integrations.github.tasks.badge.enqueue_job")
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    mocker.patch.object(
+        github_issue,
+        "list_issues_to_remove_badge_from_auto",
+        new=AsyncMock(return_value=[issue]),
+    )
+
+    # then
+    session.expunge_all()
+
+    await remove_badges_on_repository(
+        job_context,
+        external_organization_linked.id,
+        repository_linked.id,
+        polar_worker_context,
+    )
+
+    enqueue_job_mock.assert_called_once_with(
+        "github.badge.remove_on_issues",
+        external_organization_linked.id,
+        repository_linked.id,
+        [issue.number],
+    )
+
+
+@pytest.mark.asyncio
+async def test_remove_badge_batch(
+    mocker: MockerFixture,
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    remove_badge_many_mock = mocker.patch.object(
+        github_issue, "remove_badge_many", new=AsyncMock()
+    )
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    # then
+    session.expunge_all()
+
+    await remove_badge_batch(
+        job_context,
+        external_organization_linked.id,
+        repository_linked.id,
+        [issue.number],
+        polar_worker_context,
+    )
+
+    remove_badge_many_mock.assert_called_once()
+    [badge] = remove_badge_many_mock.call_args.kwargs["badges"]
+    assert badge.issue.id == issue.id
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+async def test_embed_badge_batch_rate_limited(
+    mocker: MockerFixture,
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    get_app_installation_client_mock = mocker.patch(
+        "polar.integrations.github.service.issue.github.get_app_installation_client"
+    )
+    mocker.patch("polar.integrations.github.service.issue.loops_service.issue_badged")
+
+    repository_linked.pledge_badge_auto_embed = True
+    await save_fixture(repository_linked)
+
+    embedded = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    rate_limited = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    async def embed(badge: GithubBadge, client: Any) -> None:
+        if badge.issue.id == rate_limited.id:
+            raise PrimaryRateLimitExceeded(
+                Response(
+                    httpx.Response(
+                        403, request=httpx.Request("GET", "https://api.github.com/")
+                    ),
+                    Any,
+                ),
+                datetime.timedelta(seconds=60),
+            )
+
+    mocker.patch.object(GithubBadge, "embed", autospec=True, side_effect=embed)
+
+    # then
+    session.expunge_all()
+
+    # The job is retried once the rate limit resets, instead of waiting for it
+    with pytest.raises(Retry):
+        await embed_badge_batch(
+            job_context,
+            external_organization_linked.id,
+            repository_linked.id,
+            [embedded.number, rate_limited.number],
+            polar_worker_context,
+        )
+
+    get_app_installation_client_mock.assert_called_once_with(
+        external_organization_linked.installation_id, auto_retry=crawl_retry
+    )
+
+    session.expunge_all()
+
+    # The badge embedded before hitting the rate limit is saved
+    updated_embedded = await github_issue.get(session, embedded.id)
+    assert updated_embedded is not None
+    assert updated_embedded.pledge_badge_ever_embedded is True
+
+    updated_rate_limited = await github_issue.get(session, rate_limited.id)
+    assert updated_rate_limited is not None
+    assert updated_rate_limited.pledge_badge_ever_embedded is False
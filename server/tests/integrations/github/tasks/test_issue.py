@@ -0,0 +1,276 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from arq.jobs import Job, JobStatus
+from pytest_mock import MockerFixture
+
+from polar.integrations.github.service.api import RateLimit, github_api
+from polar.integrations.github.service.issue import github_issue
+from polar.integrations.github.tasks.issue import (
+    cron_refresh_issue_timelines,
+    cron_refresh_issues,
+    issue_sync_batch,
+)
+from polar.kit.utils import utc_now
+from polar.models.external_organization import ExternalOrganization
+from polar.models.organization import Organization
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from polar.worker import JobContext, PolarWorkerContext, QueueName
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import (
+    create_external_organization,
+    create_issue,
+    create_repository,
+)
+
+
+def rate_limit(remaining: int) -> RateLimit:
+    return RateLimit(limit=5000, remaining=remaining, used=0, reset=0)
+
+
+@pytest.fixture
+def job_status_mock(mocker: MockerFixture) -> AsyncMock:
+    return mocker.patch.object(
+        Job, "status", new=AsyncMock(return_value=JobStatus.not_found)
+    )
+
+
+@pytest.fixture
+def rate_limit_mock(mocker: MockerFixture) -> AsyncMock:
+    mocker.patch("polar.integrations.github.tasks.issue.get_app_installation_client")
+    return mocker.patch.object(
+        github_api, "get_rate_limit", new=AsyncMock(return_value=rate_limit(5000))
+    )
+
+
+@pytest.mark.asyncio
+async def test_cron_refresh_issues(
+    mocker: MockerFixture,
+    job_status_mock: AsyncMock,
+    rate_limit_mock: AsyncMock,
+    job_context: JobContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    enqueue_job_mock = mocker.patch("polar.integrations.github.tasks.issue.enqueue_job")
+
+    stale = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    fresh = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    fresh.github_issue_fetched_at = utc_now()
+    await save_fixture(fresh)
+
+    # then
+    session.expunge_all()
+
+    await cron_refresh_issues(job_context)
+
+    # Syncing is left to a job on the crawl queue, one per organization
+    enqueue_job_mock.assert_called_once_with(
+        "github.issue.sync.batch",
+        [stale.id],
+        _job_id=f"github.issue.sync.batch:{external_organization_linked.id}",
+        queue_name=QueueName.github_crawl,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status", [JobStatus.queued, JobStatus.deferred, JobStatus.in_progress]
+)
+async def test_cron_refresh_issues_batch_pending(
+    status: JobStatus,
+    mocker: MockerFixture,
+    job_status_mock: AsyncMock,
+    rate_limit_mock: AsyncMock,
+    job_context: JobContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    job_status_mock.return_value = status
+    enqueue_job_mock = mocker.patch("polar.integrations.github.tasks.issue.enqueue_job")
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    # then
+    session.expunge_all()
+
+    await cron_refresh_issues(job_context)
+
+    enqueue_job_mock.assert_not_called()
+
+    # Issues are left unclaimed until the pending batch has run
+    updated_issue = await github_issue.get(session, issue.id)
+    assert updated_issue is not None
+    assert updated_issue.github_issue_fetched_at is None
+
+
+@pytest.mark.asyncio
+async def test_cron_refresh_issues_rate_limit_almost_exhausted(
+    mocker: MockerFixture,
+    job_status_mock: AsyncMock,
+    rate_limit_mock: AsyncMock,
+    job_context: JobContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    rate_limit_mock.return_value = rate_limit(10)
+    enqueue_job_mock = mocker.patch("polar.integrations.github.tasks.issue.enqueue_job")
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    # then
+    session.expunge_all()
+
+    await cron_refresh_issues(job_context)
+
+    enqueue_job_mock.assert_not_called()
+
+    updated_issue = await github_issue.get(session, issue.id)
+    assert updated_issue is not None
+    assert updated_issue.github_issue_fetched_at is None
+
+
+@pytest.mark.asyncio
+async def test_issue_sync_batch(
+    mocker: MockerFixture,
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    mocker.patch("polar.integrations.github.tasks.issue.get_app_installation_client")
+    mocker.patch.object(github_api, "get_rate_limit", return_value=rate_limit(5000))
+    sync_issues_batch_mock = mocker.patch.object(
+        github_issue, "sync_issues_batch", new=AsyncMock()
+    )
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    # then
+    session.expunge_all()
+
+    await issue_sync_batch(job_context, [issue.id], polar_worker_context)
+
+    sync_issues_batch_mock.assert_called_once()
+    [(org, repo, synced_issue)] = sync_issues_batch_mock.call_args[0][1]
+    assert org.id == external_organization_linked.id
+    assert repo.id == repository_linked.id
+    assert synced_issue.id == issue.id
+
+
+@pytest.mark.asyncio
+async def test_issue_sync_batch_rate_limit_almost_exhausted(
+    mocker: MockerFixture,
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    mocker.patch("polar.integrations.github.tasks.issue.get_app_installation_client")
+    mocker.patch.object(github_api, "get_rate_limit", return_value=rate_limit(10))
+    sync_issues_batch_mock = mocker.patch.object(
+        github_issue, "sync_issues_batch", new=AsyncMock()
+    )
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    # then
+    session.expunge_all()
+
+    await issue_sync_batch(job_context, [issue.id], polar_worker_context)
+
+    sync_issues_batch_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cron_refresh_issues_per_installation(
+    mocker: MockerFixture,
+    job_status_mock: AsyncMock,
+    rate_limit_mock: AsyncMock,
+    job_context: JobContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    organization: Organization,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    enqueue_job_mock = mocker.patch("polar.integrations.github.tasks.issue.enqueue_job")
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    other_installation = await create_external_organization(
+        save_fixture, organization=organization
+    )
+    other_installation_issue = await create_issue(
+        save_fixture,
+        other_installation,
+        await create_repository(save_fixture, other_installation, is_private=False),
+    )
+
+    # then
+    session.expunge_all()
+
+    await cron_refresh_issues(job_context)
+
+    enqueued_issue_ids = [call.args[1] for call in enqueue_job_mock.call_args_list]
+    assert sorted(enqueued_issue_ids) == sorted(
+        [[issue.id], [other_installation_issue.id]]
+    )
+
+
+@pytest.mark.asyncio
+async def test_cron_refresh_issue_timelines(
+    mocker: MockerFixture,
+    rate_limit_mock: AsyncMock,
+    job_context: JobContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    enqueue_job_mock = mocker.patch("polar.integrations.github.tasks.issue.enqueue_job")
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    # then
+    session.expunge_all()
+
+    await cron_refresh_issue_timelines(job_context)
+
+    # Deterministic job ids: arq skips issues whose job is still pending
+    enqueue_job_mock.assert_called_once()
+    assert enqueue_job_mock.call_args.args == (
+        "github.issue.sync.issue_references",
+        issue.id,
+    )
+    assert (
+        enqueue_job_mock.call_args.kwargs["_job_id"]
+        == f"github.issue.sync.issue_references:{issue.id}"
+    )
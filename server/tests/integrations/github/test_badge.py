@@ -1,7 +1,10 @@
 from datetime import UTC, datetime
+from typing import Any
 from unittest.mock import patch
 
+import httpx
 import pytest
+from pytest_mock import MockerFixture
 
 from polar.integrations.github.badge import GithubBadge
 from polar.integrations.github.service.issue import github_issue
@@ -413,3 +416,150 @@ async def test_list_issues_to_remove_badge_from_auto(
     )
 
     assert [i.id for i in issues] == [i1.id, i2.id, i4.id]
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+async def test_embed_badge_many(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    organization: Organization,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    embed_mock = mocker.patch.object(GithubBadge, "embed")
+    mocker.patch("polar.integrations.github.service.issue.loops_service.issue_badged")
+
+    i1 = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    i2 = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    i3 = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    repository_linked.pledge_badge_auto_embed = True
+    await save_fixture(repository_linked)
+
+    # Do not add, as badge has been manually removed
+    i2.pledge_badge_ever_embedded = True
+    await save_fixture(i2)
+
+    embedded = await github_issue.embed_badge_many(
+        session,
+        badges=[
+            GithubBadge(
+                external_organization=external_organization_linked,
+                repository=repository_linked,
+                issue=issue,
+                organization=organization,
+            )
+            for issue in [i1, i2, i3]
+        ],
+        triggered_from_label=False,
+    )
+
+    assert [i.id for i in embedded] == [i1.id, i3.id]
+    assert embed_mock.call_count == 2
+
+    # then
+    session.expunge_all()
+
+    for issue in [i1, i3]:
+        updated = await github_issue.get(session, issue.id)
+        assert updated is not None
+        assert updated.pledge_badge_embedded_at is not None
+        assert updated.pledge_badge_ever_embedded is True
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+async def test_embed_badge_many_partial_failure(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    organization: Organization,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    i1 = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    i2 = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    repository_linked.pledge_badge_auto_embed = True
+    await save_fixture(repository_linked)
+
+    error = httpx.ConnectError("Connection refused")
+
+    async def embed(badge: GithubBadge, client: Any) -> None:
+        if badge.issue.id == i2.id:
+            raise error
+
+    mocker.patch.object(GithubBadge, "embed", autospec=True, side_effect=embed)
+    issue_badged_mock = mocker.patch(
+        "polar.integrations.github.service.issue.loops_service.issue_badged"
+    )
+
+    with pytest.raises(httpx.ConnectError):
+        await github_issue.embed_badge_many(
+            session,
+            badges=[
+                GithubBadge(
+                    external_organization=external_organization_linked,
+                    repository=repository_linked,
+                    issue=issue,
+                    organization=organization,
+                )
+                for issue in [i1, i2]
+            ],
+            triggered_from_label=False,
+        )
+
+    # The badge written to GitHub is saved even though the other one failed
+    issue_badged_mock.assert_called_once()
+
+    # then
+    session.expunge_all()
+
+    updated_i1 = await github_issue.get(session, i1.id)
+    assert updated_i1 is not None
+    assert updated_i1.pledge_badge_embedded_at is not None
+    assert updated_i1.pledge_badge_ever_embedded is True
+
+    updated_i2 = await github_issue.get(session, i2.id)
+    assert updated_i2 is not None
+    assert updated_i2.pledge_badge_embedded_at is None
+    assert updated_i2.pledge_badge_ever_embedded is False
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+async def test_list_issues_to_add_badge_to_auto_disabled(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization: ExternalOrganization,
+    repository: Repository,
+) -> None:
+    await create_issue(save_fixture, external_organization, repository)
+
+    repository.pledge_badge_auto_embed = False
+    await save_fixture(repository)
+
+    # then
+    session.expunge_all()
+
+    list_mock = mocker.spy(github_issue, "list_by_repository_type_and_status")
+
+    issues = await github_issue.list_issues_to_add_badge_to_auto(
+        session, external_organization, repository
+    )
+
+    assert issues == []
+    list_mock.assert_not_called()
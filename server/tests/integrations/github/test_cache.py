@@ -0,0 +1,131 @@
+import datetime
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.integrations.github.cache import RedisCache, _local_cache
+
+
+@pytest.fixture
+def redis_mock(mocker: MockerFixture) -> MagicMock:
+    redis = mocker.patch("polar.integrations.github.cache.redis", new=MagicMock())
+    redis.setex = AsyncMock()
+    pipe = redis.pipeline.return_value.__aenter__.return_value
+    pipe.get = MagicMock()
+    pipe.pttl = MagicMock()
+    pipe.execute = AsyncMock()
+    return redis
+
+
+@pytest.fixture
+def monotonic_mock(mocker: MockerFixture) -> MagicMock:
+    time = mocker.patch("polar.integrations.github.cache.time")
+    time.monotonic.return_value = 1000.0
+    return time.monotonic
+
+
+def get_pipeline_execute(redis_mock: MagicMock) -> Any:
+    return redis_mock.pipeline.return_value.__aenter__.return_value.execute
+
+
+@pytest.mark.asyncio
+async def test_aget_hit(redis_mock: MagicMock, monotonic_mock: MagicMock) -> None:
+    execute = get_pipeline_execute(redis_mock)
+    execute.return_value = ["TOKEN", 60_000]
+
+    cache = RedisCache("app")
+    assert await cache.aget("key") == "TOKEN"
+    assert await cache.aget("key") == "TOKEN"
+
+    # The second read is served from memory
+    execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_aget_expired(redis_mock: MagicMock, monotonic_mock: MagicMock) -> None:
+    execute = get_pipeline_execute(redis_mock)
+    execute.return_value = ["TOKEN", 60_000]
+
+    cache = RedisCache("app")
+    assert await cache.aget("key") == "TOKEN"
+
+    # Expires along with the Redis key
+    monotonic_mock.return_value = 1000.0 + 60
+    execute.return_value = ["NEW_TOKEN", 60_000]
+    assert await cache.aget("key") == "NEW_TOKEN"
+
+    assert execute.call_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ttl", [-1, -2, 0])
+async def test_aget_no_ttl(
+    ttl: int, redis_mock: MagicMock, monotonic_mock: MagicMock
+) -> None:
+    execute = get_pipeline_execute(redis_mock)
+    execute.return_value = ["TOKEN", ttl]
+
+    cache = RedisCache("app")
+    assert await cache.aget("key") == "TOKEN"
+    assert await cache.aget("key") == "TOKEN"
+
+    # Keys without expiration are always read from Redis
+    assert execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_aget_miss(redis_mock: MagicMock, monotonic_mock: MagicMock) -> None:
+    execute = get_pipeline_execute(redis_mock)
+    execute.return_value = [None, -2]
+
+    cache = RedisCache("app")
+    assert await cache.aget("key") is None
+    assert await cache.aget("key") is None
+
+    assert execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_aset(redis_mock: MagicMock, monotonic_mock: MagicMock) -> None:
+    execute = get_pipeline_execute(redis_mock)
+
+    cache = RedisCache("app")
+    await cache.aset("key", "TOKEN", datetime.timedelta(minutes=1))
+
+    redis_mock.setex.assert_called_once_with(
+        "githubkit:app:key", time=datetime.timedelta(minutes=1), value="TOKEN"
+    )
+
+    # Read back from memory, without hitting Redis
+    assert await cache.aget("key") == "TOKEN"
+    execute.assert_not_called()
+
+    monotonic_mock.return_value = 1000.0 + 60
+    execute.return_value = [None, -2]
+    assert await cache.aget("key") is None
+    execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_local_cache_bounded(
+    mocker: MockerFixture, redis_mock: MagicMock, monotonic_mock: MagicMock
+) -> None:
+    mocker.patch("polar.integrations.github.cache.LOCAL_CACHE_MAX_SIZE", 2)
+    execute = get_pipeline_execute(redis_mock)
+
+    cache = RedisCache("app")
+    await cache.aset("expired", "TOKEN", datetime.timedelta(seconds=1))
+    await cache.aset("old", "TOKEN", datetime.timedelta(minutes=1))
+
+    # Expired entries are purged first
+    monotonic_mock.return_value = 1000.0 + 1
+    await cache.aset("new", "TOKEN", datetime.timedelta(minutes=1))
+    assert set(_local_cache) == {"githubkit:app:old", "githubkit:app:new"}
+
+    # Then the least recently used ones
+    assert await cache.aget("old") == "TOKEN"
+    execute.assert_not_called()
+    await cache.aset("newer", "TOKEN", datetime.timedelta(minutes=1))
+    assert set(_local_cache) == {"githubkit:app:old", "githubkit:app:newer"}
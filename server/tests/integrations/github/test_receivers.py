@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.integrations.github.receivers import schedule_embed_badge_task
+from polar.issue.hooks import IssueHook
+from polar.models.external_organization import ExternalOrganization
+from polar.models.repository import Repository
+from polar.postgres import AsyncSession
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import create_issue
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("badge_embed", "pledge_badge_ever_embedded"),
+    [(False, False), (True, True)],
+)
+async def test_schedule_embed_badge_task_skip_lookups(
+    badge_embed: bool,
+    pledge_badge_ever_embedded: bool,
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    get_linked_mock = mocker.patch(
+        "polar.integrations.github.receivers.external_organization_service.get_linked"
+    )
+    repository_get_mock = mocker.patch(
+        "polar.integrations.github.receivers.repository_service.get"
+    )
+    enqueue_job_mock = mocker.patch("polar.integrations.github.receivers.enqueue_job")
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+    issue.pledge_badge_ever_embedded = pledge_badge_ever_embedded
+    await save_fixture(issue)
+
+    # then
+    session.expunge_all()
+
+    with patch("polar.config.settings.GITHUB_BADGE_EMBED", badge_embed):
+        await schedule_embed_badge_task(IssueHook(session, issue))
+
+    get_linked_mock.assert_not_called()
+    repository_get_mock.assert_not_called()
+    enqueue_job_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch("polar.config.settings.GITHUB_BADGE_EMBED", True)
+async def test_schedule_embed_badge_task(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    enqueue_job_mock = mocker.patch("polar.integrations.github.receivers.enqueue_job")
+
+    repository_linked.pledge_badge_auto_embed = True
+    await save_fixture(repository_linked)
+
+    issue = await create_issue(
+        save_fixture, external_organization_linked, repository_linked
+    )
+
+    # then
+    session.expunge_all()
+
+    await schedule_embed_badge_task(IssueHook(session, issue))
+
+    enqueue_job_mock.assert_called_once_with("github.badge.embed_on_issue", issue.id)
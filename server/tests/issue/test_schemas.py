@@ -0,0 +1,54 @@
+import pytest
+
+from polar.integrations.github import types
+from polar.issue.schemas import IssueCreate, IssueUpdate
+from polar.models.external_organization import ExternalOrganization
+from polar.models.repository import Repository
+from tests.fixtures.vcr import read_cassette
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+@pytest.mark.parametrize(
+    "issue_type", [types.Issue, types.WebhookIssuesOpenedPropIssue]
+)
+async def test_issue_create_from_github_fast(
+    issue_type: type[types.Issue] | type[types.WebhookIssuesOpenedPropIssue],
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    repository_linked.pledge_badge_label = "Fund"
+    data = issue_type.model_validate(
+        read_cassette("github/webhooks/issues.opened_with_polar_label.json")["body"][
+            "issue"
+        ]
+    )
+
+    validated = IssueCreate.from_github(
+        data, external_organization_linked, repository_linked
+    )
+    constructed = IssueCreate.from_github_fast(
+        data, external_organization_linked, repository_linked
+    )
+
+    assert constructed.model_dump() == validated.model_dump()
+    assert constructed.has_pledge_badge_label is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+async def test_issue_update_from_github_fast(
+    external_organization_linked: ExternalOrganization,
+    repository_linked: Repository,
+) -> None:
+    data = types.Issue.model_validate(
+        read_cassette("github/webhooks/issues.opened_with_polar_label.json")["body"][
+            "issue"
+        ]
+    )
+
+    constructed = IssueUpdate.from_github_fast(
+        data, external_organization_linked, repository_linked
+    )
+
+    assert isinstance(constructed, IssueUpdate)